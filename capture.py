@@ -1,9 +1,22 @@
 import cv2
+import json
+import random
 import requests
 import threading
 import time
 
-URL = "http://127.0.0.1:8000/api/mark-attendance"
+from core.config import (
+    TRACK_FRAMES,
+    TRACK_FRAME_STRIDE,
+    TRACK_MAX_MISSED,
+    TRACK_CROP_PADDING,
+    TRACK_MAX_RETRIES,
+    TRACK_RETRY_BACKOFF,
+    TRACK_RETRY_MAX_BACKOFF,
+)
+from facerecognition_module.quality import check_image_quality
+
+URL = "http://127.0.0.1:8000/api/mark-attendance-track"
 
 face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
 cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
@@ -12,51 +25,139 @@ if not cap.isOpened():
     print("❌ Error: Could not open camera.")
     exit()
 
-is_sending = False  # Prevent multiple API calls at once
+tracks = []  # One entry per face in view: box, collected crops, frames missed, sent flag, retries
+frame_count = 0
+
+def iou(a, b):
+    """Intersection over union of two (x, y, w, h) boxes."""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    inter_w = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    inter_h = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = inter_w * inter_h
+    union = aw * ah + bw * bh - inter
+    return inter / union if union else 0
+
+def crop_with_padding(frame, box):
+    """Crops the face plus a margin, returns (crop, face box in the crop as [top, right, bottom, left])."""
+    x, y, w, h = box
+    pad_x, pad_y = int(w * TRACK_CROP_PADDING), int(h * TRACK_CROP_PADDING)
+    x0, y0 = max(x - pad_x, 0), max(y - pad_y, 0)
+    x1, y1 = min(x + w + pad_x, frame.shape[1]), min(y + h + pad_y, frame.shape[0])
+    return frame[y0:y1, x0:x1].copy(), [y - y0, x + w - x0, y + h - y0, x - x0]
+
+def should_retry(response):
+    """
+    True if the same person should get another try: the server asked for a better frame, or failed.
+    A failed liveness check (403) is not retried, a photo held up long enough would eventually pass;
+    the person has to leave the view and come back, which starts a new track.
+    """
+    if response.status_code >= 500:
+        return True
+    if response.status_code == 422:
+        detail = response.json().get("detail")
+        return isinstance(detail, dict) and detail.get("retry", False)
+    return False
+
+def retry_delay(retries):
+    """Exponential backoff with jitter, so kiosks that failed together don't retry together."""
+    return min(TRACK_RETRY_BACKOFF * 2 ** (retries - 1), TRACK_RETRY_MAX_BACKOFF) * random.uniform(0.5, 1)
+
+def send_track(track, crops, boxes):
+    """Send the crops of one tracked face to the API in a separate thread."""
+    retry = True
+    server_failed = True  # Transport error or 5xx, back off before trying again
+    files = []
+    for i, crop in enumerate(crops):
+        _, img_encoded = cv2.imencode('.jpg', crop)
+        files.append(("files", (f"frame_{i}.jpg", img_encoded.tobytes(), "image/jpeg")))
 
-def send_attendance(frame):
-    """Send face image to API in a separate thread."""
-    global is_sending
-    is_sending = True  # Mark as sending
-    
-    _, img_encoded = cv2.imencode('.jpg', frame)
-    
     try:
         start_time = time.time()
-        response = requests.post(URL, files={"file": ("image.jpg", img_encoded.tobytes(), "image/jpeg")})
+        response = requests.post(URL, files=files, data={"boxes": json.dumps(boxes)})
         end_time = time.time()
-        
+
         if response.status_code == 200:
             print(f"✅ Attendance Marked: {response.json()}")
         else:
             print(f"❌ Attendance Failed: {response.text}")
+        retry = should_retry(response)
+        server_failed = response.status_code >= 500
 
         print(f"⏳ API Response Time: {round(end_time - start_time, 2)} seconds")
 
     except Exception as e:
         print(f"❌ Error sending attendance: {str(e)}")
-    
-    is_sending = False  # Ready for next request
+
+    if retry and track["retries"] >= TRACK_MAX_RETRIES:
+        print("🛑 Giving up on this face, step out of view and back to try again")
+    elif retry:
+        # ✅ Collect a fresh set of crops from the same track instead of waiting for the face to leave
+        track["retries"] += 1
+        if server_failed:
+            delay = retry_delay(track["retries"])
+            track["retry_at"] = time.time() + delay
+            print(f"🔁 Retrying with new frames in {delay:.1f} seconds...")
+        else:
+            print("🔁 Retrying with new frames...")
+        track["sent"] = False
+
+def update_tracks(frame, gray, faces):
+    """Matches detections to tracks and collects crops, one request per track once enough are collected."""
+    global tracks
+
+    for track in tracks:
+        track["missed"] += 1
+
+    for box in faces:
+        box = tuple(int(v) for v in box)
+        best = max(tracks, key=lambda t: iou(t["box"], box), default=None)
+        if best is None or iou(best["box"], box) < 0.3:
+            best = {"box": box, "crops": [], "boxes": [], "good": False, "missed": 0, "sent": False,
+                    "retries": 0, "retry_at": 0}
+            tracks.append(best)
+        best["box"] = box
+        best["missed"] = 0
+
+        if best["sent"] or frame_count % TRACK_FRAME_STRIDE or time.time() < best["retry_at"]:
+            continue
+
+        crop, face_box = crop_with_padding(frame, box)
+        best["crops"].append(crop)
+        best["boxes"].append(face_box)
+
+        # Blink frames may fail the gate, but at least one crop has to be good enough to encode
+        x, y, w, h = box
+        if check_image_quality(gray[y:y + h, x:x + w], w, h) is None:
+            best["good"] = True
+
+        if len(best["crops"]) >= TRACK_FRAMES:
+            if best["good"]:
+                print("📸 Face tracked, sending crops for liveness and recognition...")
+                best["sent"] = True  # ✅ Only once per track, unless the server asks for a retry
+                threading.Thread(target=send_track, args=(best, best["crops"], best["boxes"])).start()
+            best["crops"], best["boxes"], best["good"] = [], [], False
+
+    # A face that leaves the view for a while starts a new track when it comes back
+    tracks = [track for track in tracks if track["missed"] <= TRACK_MAX_MISSED]
 
 while True:
     ret, frame = cap.read()
     if not ret:
         print("❌ Error: Could not capture frame.")
         break
+    frame_count += 1
 
     gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
     faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
 
+    update_tracks(frame, gray, faces)  # Before drawing, so crops don't contain the boxes
+
     for (x, y, w, h) in faces:
         cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
 
     cv2.imshow("Camera Preview", frame)
 
-    # Send request **ONLY** if no other request is in progress
-    if len(faces) > 0 and not is_sending:
-        print("📸 Face detected, sending image for recognition...")
-        threading.Thread(target=send_attendance, args=(frame,)).start()
-
     if cv2.waitKey(1) & 0xFF == ord("q"):
         break
 
@@ -0,0 +1,43 @@
+import hashlib
+import json
+import time
+
+
+class TTLCache:
+    """
+    Small in-process cache where entries expire after `ttl` seconds.
+    Each worker process has its own copy, so the TTL bounds how stale a
+    worker can be when another worker changes the data.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, value):
+        if len(self._entries) >= self.max_entries:
+            # Drop the entry closest to expiry
+            oldest = min(self._entries, key=lambda k: self._entries[k][0])
+            del self._entries[oldest]
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def clear(self):
+        self._entries.clear()
+
+
+def make_etag(payload) -> str:
+    """Strong ETag from the JSON form of a response payload."""
+    body = json.dumps(payload, sort_keys=True, default=str).encode()
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
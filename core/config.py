@@ -0,0 +1,70 @@
+import os
+
+# ✅ Face Quality Gate (checked before the expensive face encoder runs)
+FACE_MIN_SIZE = int(os.getenv("FACE_MIN_SIZE", 80))  # Min face width/height in pixels
+FACE_BLUR_THRESHOLD = float(os.getenv("FACE_BLUR_THRESHOLD", 60.0))  # Min Laplacian variance
+FACE_MAX_YAW = float(os.getenv("FACE_MAX_YAW", 0.35))  # Nose offset / eye distance
+FACE_MAX_ROLL = float(os.getenv("FACE_MAX_ROLL", 20.0))  # Eye line tilt in degrees
+FACE_MIN_BRIGHTNESS = float(os.getenv("FACE_MIN_BRIGHTNESS", 50.0))  # Mean gray level (0-255)
+FACE_MAX_BRIGHTNESS = float(os.getenv("FACE_MAX_BRIGHTNESS", 210.0))
+
+# ✅ MongoDB Connection Pool (sizes are per uvicorn worker process)
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
+MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "attendance_system")
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", 100))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", 10))  # Opened at startup so shift start doesn't pay for it
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", 300000))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", 5000))  # Max wait for a free connection
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", 5000))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", 20000))
+
+# ✅ Leave Queries
+LEAVE_PAGE_SIZE = int(os.getenv("LEAVE_PAGE_SIZE", 50))
+LEAVE_MAX_PAGE_SIZE = int(os.getenv("LEAVE_MAX_PAGE_SIZE", 200))
+PENDING_LEAVES_CACHE_TTL = float(os.getenv("PENDING_LEAVES_CACHE_TTL", 5))  # Seconds
+
+# ✅ Deployment Mode
+# "all": every route, "api": no face recognition (vision libs never imported),
+# "recognition": only the attendance camera endpoints
+APP_MODE = os.getenv("APP_MODE", "all")
+RECOGNITION_WARMUP = os.getenv("RECOGNITION_WARMUP", "1") == "1"  # Load dlib models at startup
+
+# ✅ Image Thumbnails
+THUMBNAIL_SIZES = {"small": 64, "medium": 160, "large": 480}  # Longest side in pixels
+THUMBNAIL_CACHE_DIR = os.getenv("THUMBNAIL_CACHE_DIR", ".cache/thumbnails")
+THUMBNAIL_CACHE_MAX_MB = int(os.getenv("THUMBNAIL_CACHE_MAX_MB", 200))
+THUMBNAIL_QUALITY = int(os.getenv("THUMBNAIL_QUALITY", 85))  # JPEG quality
+THUMBNAIL_EVICTION_GRACE = float(os.getenv("THUMBNAIL_EVICTION_GRACE", 30))  # Seconds a served thumbnail is safe from eviction
+# Images can be overwritten in place under the same URL, so browsers must revalidate (cheap 304 via ETag)
+IMAGE_CACHE_CONTROL = os.getenv("IMAGE_CACHE_CONTROL", "public, no-cache")
+
+# ✅ Liveness / Anti-Spoof (scored once per tracked face from a short crop sequence)
+# A single frame can't prove liveness, so /mark-attendance (which accepts a printed photo) is refused
+# by default and cameras use /mark-attendance-track. Set to 0 only while old kiosks are migrated.
+LIVENESS_REQUIRED = os.getenv("LIVENESS_REQUIRED", "1") == "1"
+LIVENESS_MIN_FRAMES = int(os.getenv("LIVENESS_MIN_FRAMES", 5))
+LIVENESS_MAX_FRAMES = int(os.getenv("LIVENESS_MAX_FRAMES", 16))
+LIVENESS_EAR_CLOSED = float(os.getenv("LIVENESS_EAR_CLOSED", 0.21))  # Eye aspect ratio of a closed eye
+LIVENESS_BLINK_RATIO = float(os.getenv("LIVENESS_BLINK_RATIO", 0.75))  # Min EAR / max EAR during a blink
+LIVENESS_LANDMARK_JITTER_PX = float(os.getenv("LIVENESS_LANDMARK_JITTER_PX", 1.0))  # Per-point landmark noise of a still face
+LIVENESS_BLINK_NOISE_MULTIPLE = float(os.getenv("LIVENESS_BLINK_NOISE_MULTIPLE", 4.0))  # EAR dip, in units of jitter / eye width
+LIVENESS_MIN_EYE_WIDTH = float(os.getenv("LIVENESS_MIN_EYE_WIDTH", 24))  # Eye corner to corner (~1/4 of the face box), smaller eyes never count as a blink
+# Landmark jitter (~1 px per point) leaves a flat picture a homography residual of ~2 px, while a
+# head turning 15-20 degrees adds well under 1 px on top, so parallax only catches large head
+# movements and blinks do most of the work. Measure the noise floor on your cameras with
+# `python liveness_benchmark.py <set> --calibrate` before changing these.
+LIVENESS_LANDMARK_NOISE_PX = float(os.getenv("LIVENESS_LANDMARK_NOISE_PX", 2.5))  # Max residual of a flat picture (jitter only)
+LIVENESS_PARALLAX_NOISE_MULTIPLE = float(os.getenv("LIVENESS_PARALLAX_NOISE_MULTIPLE", 1.5))  # Residual that counts as 3D motion
+LIVENESS_PARALLAX_MIN_FRAMES = int(os.getenv("LIVENESS_PARALLAX_MIN_FRAMES", 3))  # Frames that must show it
+LIVENESS_MAX_MOIRE = float(os.getenv("LIVENESS_MAX_MOIRE", 40.0))  # High-frequency spectral peak / mean
+LIVENESS_REFINE_FRAMES = int(os.getenv("LIVENESS_REFINE_FRAMES", 3))  # Crops that get a dlib HOG detection to correct the camera's boxes
+
+# ✅ Camera Face Tracking (capture.py)
+TRACK_FRAMES = int(os.getenv("TRACK_FRAMES", 10))  # Crops sent per tracked face
+TRACK_FRAME_STRIDE = int(os.getenv("TRACK_FRAME_STRIDE", 3))  # Keep every Nth frame, so a blink fits in the window
+TRACK_MAX_MISSED = int(os.getenv("TRACK_MAX_MISSED", 10))  # Frames without a detection before a track ends
+TRACK_CROP_PADDING = float(os.getenv("TRACK_CROP_PADDING", 0.3))  # Margin around the face box, as a fraction of its size
+TRACK_MAX_RETRIES = int(os.getenv("TRACK_MAX_RETRIES", 3))  # Resends per track before it gives up
+TRACK_RETRY_BACKOFF = float(os.getenv("TRACK_RETRY_BACKOFF", 2.0))  # Seconds before the first resend after a server error, doubles each time
+TRACK_RETRY_MAX_BACKOFF = float(os.getenv("TRACK_RETRY_MAX_BACKOFF", 30.0))
@@ -0,0 +1,170 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from PIL import Image, ImageOps
+from starlette.concurrency import run_in_threadpool
+
+from core.config import (
+    THUMBNAIL_SIZES,
+    THUMBNAIL_CACHE_DIR,
+    THUMBNAIL_CACHE_MAX_MB,
+    THUMBNAIL_QUALITY,
+    THUMBNAIL_EVICTION_GRACE,
+)
+
+STALE_TMP_AGE = 3600  # Seconds after which a .tmp file is a leftover, not another worker's write in progress
+
+
+class ThumbnailCache:
+    """
+    Resized JPEG copies of uploaded images, generated on first request and kept
+    on disk. When the cache grows past `max_bytes` the least recently served
+    thumbnails are deleted. File mtimes hold the LRU order across restarts.
+    Thumbnails handed out in the last `grace` seconds are never evicted, so a
+    response that is still streaming a file can't have it deleted underneath it;
+    the cache may briefly exceed `max_bytes` instead.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int, grace: float = THUMBNAIL_EVICTION_GRACE):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.grace = grace
+        self._files = OrderedDict()  # filename -> (size in bytes, last served), least recently used first
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._pending = {}  # filename -> asyncio.Lock, so one thumbnail is only generated once
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        entries = []
+        for filename in os.listdir(cache_dir):
+            path = os.path.join(cache_dir, filename)
+            # Other workers share the dir and may write, replace or evict files while we scan
+            try:
+                stat = os.stat(path)
+                if filename.endswith(".tmp"):
+                    if time.time() - stat.st_mtime > STALE_TMP_AGE:
+                        os.remove(path)  # Leftover from an interrupted write
+                    continue
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, filename, stat.st_size))
+        for _, filename, size in sorted(entries):
+            self._files[filename] = (size, float("-inf"))  # Not being served by this process
+            self._total_bytes += size
+
+    @staticmethod
+    def cache_key(source_path: str, size_name: str) -> str:
+        """Changes whenever the source file changes, so stale thumbnails are never served."""
+        stat = os.stat(source_path)
+        raw = f"{os.path.abspath(source_path)}|{stat.st_mtime_ns}|{stat.st_size}|{size_name}"
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def _touch(self, filename):
+        with self._lock:
+            if filename not in self._files:
+                return False
+            size, _ = self._files.pop(filename)
+            self._files[filename] = (size, time.monotonic())
+        try:
+            os.utime(os.path.join(self.cache_dir, filename))
+        except FileNotFoundError:
+            # Deleted behind our back, forget it so it gets rendered again
+            with self._lock:
+                if self._files.pop(filename, None):
+                    self._total_bytes -= size
+            return False
+        return True
+
+    def _add(self, filename, size):
+        with self._lock:
+            now = time.monotonic()
+            self._files[filename] = (size, now)
+            self._total_bytes += size
+            while self._total_bytes > self.max_bytes and self._files:
+                oldest = next(iter(self._files))
+                oldest_size, last_served = self._files[oldest]
+                if now - last_served < self.grace:
+                    break  # Everything after it was served even more recently
+                del self._files[oldest]
+                path = os.path.join(self.cache_dir, oldest)
+                try:
+                    if time.time() - os.stat(path).st_mtime < self.grace:
+                        # Served by another worker sharing the cache dir, keep it as recently used
+                        self._files[oldest] = (oldest_size, now)
+                        continue
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                self._total_bytes -= oldest_size
+                self.evictions += 1
+
+    def _render(self, source_path, size_name, filename):
+        """Resize and write the thumbnail (blocking, runs in the threadpool)."""
+        max_side = THUMBNAIL_SIZES[size_name]
+        path = os.path.join(self.cache_dir, filename)
+        # Unique per write, so workers rendering the same thumbnail never share a temp file
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+
+        try:
+            with os.fdopen(fd, "wb") as tmp, Image.open(source_path) as img:
+                img.draft("RGB", (max_side, max_side))  # Let JPEG decode at a reduced scale
+                img = ImageOps.exif_transpose(img).convert("RGB")  # Phone photos are often rotated by EXIF
+                img.thumbnail((max_side, max_side))
+                img.save(tmp, "JPEG", quality=THUMBNAIL_QUALITY, optimize=True)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+        self._add(filename, os.path.getsize(path))
+
+    async def get(self, source_path: str, size_name: str):
+        """
+        Returns (thumbnail path, etag), generating the thumbnail if needed.
+        Raises KeyError for an unknown size.
+        """
+        if size_name not in THUMBNAIL_SIZES:
+            raise KeyError(size_name)
+
+        key = self.cache_key(source_path, size_name)
+        filename = key + ".jpg"
+        path = os.path.join(self.cache_dir, filename)
+
+        if not self._touch(filename):
+            lock = self._pending.setdefault(filename, asyncio.Lock())
+            async with lock:
+                if not self._touch(filename):
+                    self.misses += 1
+                    await run_in_threadpool(self._render, source_path, size_name, filename)
+                else:
+                    self.hits += 1
+            self._pending.pop(filename, None)
+        else:
+            self.hits += 1
+
+        return path, f'"{key}"'
+
+    def stats(self):
+        with self._lock:
+            return {
+                "files": len(self._files),
+                "size_mb": round(self._total_bytes / (1024 * 1024), 2),
+                "max_mb": round(self.max_bytes / (1024 * 1024), 2),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+thumbnail_cache = ThumbnailCache(THUMBNAIL_CACHE_DIR, THUMBNAIL_CACHE_MAX_MB * 1024 * 1024)
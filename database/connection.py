@@ -1,10 +1,175 @@
+import asyncio
+import threading
+import time
+
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, monitoring
+
+from core.config import (
+    MONGO_URI,
+    MONGO_DB_NAME,
+    MONGO_MAX_POOL_SIZE,
+    MONGO_MIN_POOL_SIZE,
+    MONGO_MAX_IDLE_TIME_MS,
+    MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    MONGO_CONNECT_TIMEOUT_MS,
+    MONGO_SOCKET_TIMEOUT_MS,
+)
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Tracks pool utilization and how long requests wait for a free connection."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wait_started = {}  # thread id -> checkout start time
+        self.open_connections = 0
+        self.in_use = 0
+        self.waiting = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    def _checkout_finished(self, failed):
+        start = self._wait_started.pop(threading.get_ident(), None)
+        self.waiting = max(self.waiting - 1, 0)
+        if failed:
+            self.checkout_failures += 1
+            return
+        self.in_use += 1
+        self.checkouts += 1
+        if start is not None:
+            wait_ms = (time.perf_counter() - start) * 1000
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self._wait_started[threading.get_ident()] = time.perf_counter()
+            self.waiting += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self._checkout_finished(failed=False)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self._checkout_finished(failed=True)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use = max(self.in_use - 1, 0)
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections = max(self.open_connections - 1, 0)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
 
-MONGO_URI = "mongodb://localhost:27017"
-client = AsyncIOMotorClient(MONGO_URI)  # ✅ Async Client
-db = client["attendance_system"]
+    def connection_ready(self, event):
+        pass
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "max_pool_size": MONGO_MAX_POOL_SIZE,
+                "min_pool_size": MONGO_MIN_POOL_SIZE,
+                "open_connections": self.open_connections,
+                "in_use": self.in_use,
+                "waiting": self.waiting,
+                "utilization": round(self.in_use / MONGO_MAX_POOL_SIZE, 3),
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "avg_wait_ms": round(self.total_wait_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait_ms, 3),
+            }
+
+
+pool_metrics = PoolMetrics()
+
+# ✅ Async Client (no connection is opened until first use / connect_to_mongo())
+client = AsyncIOMotorClient(
+    MONGO_URI,
+    maxPoolSize=MONGO_MAX_POOL_SIZE,
+    minPoolSize=MONGO_MIN_POOL_SIZE,
+    maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+    waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+    socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+    event_listeners=[pool_metrics],
+)
+db = client[MONGO_DB_NAME]
 
 # Collections
 users_collection = db["users"]
 profiles_collection = db["profiles"]
 attendance_collection = db["attendance"]  # If needed
+
+# ✅ Indexes created at startup: (collection, keys, options)
+INDEXES = [
+    ("users", [("company_email", ASCENDING)], {"unique": True}),
+    ("profile", [("user_id", ASCENDING)], {}),
+    ("attendance", [("user_id", ASCENDING), ("check_in", DESCENDING)], {}),
+    ("leave", [("user_id", ASCENDING), ("_id", DESCENDING)], {}),  # my-leaves keyset pages
+    ("leave", [("status", ASCENDING), ("_id", ASCENDING)], {}),  # pending queue pages
+    ("leave", [("status", ASCENDING), ("department", ASCENDING), ("_id", ASCENDING)], {}),  # ...per department
+]
+
+
+def mongo_hosts(uri):
+    """Host list of a MongoDB URI, without credentials or options, safe to log."""
+    hosts = uri.split("://", 1)[-1].split("/", 1)[0].split("?", 1)[0]
+    return hosts.rsplit("@", 1)[-1]
+
+
+async def connect_to_mongo():
+    """Warm up the pool at startup: ping the server, open connections and ensure indexes."""
+    await client.admin.command("ping")
+
+    # ✅ Concurrent pings each check out their own connection, so the whole min pool
+    # is opened now instead of by pymongo's background maintenance during shift start
+    await asyncio.gather(*(client.admin.command("ping") for _ in range(MONGO_MIN_POOL_SIZE)))
+    print(
+        f"✅ Connected to MongoDB ({mongo_hosts(MONGO_URI)}/{MONGO_DB_NAME}), {pool_metrics.open_connections} connections open, "
+        f"pool size {MONGO_MIN_POOL_SIZE}-{MONGO_MAX_POOL_SIZE}"
+    )
+
+    for collection, keys, options in INDEXES:
+        try:
+            await db[collection].create_index(keys, **options)
+        except Exception as e:
+            # Don't block startup on a bad index (e.g. duplicates in existing data)
+            print(f"⚠️ Could not create index {keys} on {collection}: {str(e)}")
+
+
+async def close_mongo_connection():
+    """Close all pooled connections on shutdown."""
+    client.close()
+    print("👋 MongoDB connection closed")
+
+
+async def get_db_stats():
+    """Ping latency plus connection pool metrics."""
+    start = time.perf_counter()
+    await client.admin.command("ping")
+    return {
+        "ping_ms": round((time.perf_counter() - start) * 1000, 3),
+        "pool": pool_metrics.snapshot(),
+    }
@@ -3,6 +3,9 @@ import face_recognition
 import numpy as np
 import os
 from database.connection import db
+from core.config import LIVENESS_REFINE_FRAMES
+from facerecognition_module.quality import check_face_quality, crop_face, blur_score
+from facerecognition_module.liveness import check_liveness
 
 PROFILE_PIC_FOLDER = "dataset/"  # Ensure profile pictures are inside 'dataset/'
 
@@ -60,27 +63,54 @@ async def load_known_faces():
         print(f"🔥 ERROR in load_known_faces(): {str(e)}")
         return [], []
 
-def recognize_face(image, known_face_encodings, known_face_ids):
+def match_face(face_encoding, known_face_encodings, known_face_ids):
+    """Returns the user ID of the closest known face within tolerance, or None."""
+    matches = face_recognition.compare_faces(known_face_encodings, face_encoding, tolerance=0.5)  # 🔥 Reduce tolerance
+    face_distances = face_recognition.face_distance(known_face_encodings, face_encoding)
+    best_match_index = np.argmin(face_distances) if face_distances.size > 0 else -1
+
+    if best_match_index != -1 and matches[best_match_index]:
+        return known_face_ids[best_match_index]
+    return None
+
+def recognize_face(image, known_face_encodings, known_face_ids, rejections=None):
     """
     Recognizes a face in the given image.
+    Faces that fail the quality gate (size, exposure, blur, pose) are skipped before encoding.
 
     :param image: The captured image.
     :param known_face_encodings: List of known face encodings.
     :param known_face_ids: List of corresponding user IDs.
+    :param rejections: Optional list, filled with the rejection reason codes when no face passes the gate.
     :return: Tuple (Processed Image, User ID) or ('Unknown' if no match).
     """
     try:
         rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        gray_image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         face_locations = face_recognition.face_locations(rgb_image)
-        face_encodings = face_recognition.face_encodings(rgb_image, face_locations)
 
-        for face_encoding in face_encodings:
-            matches = face_recognition.compare_faces(known_face_encodings, face_encoding, tolerance=0.5)  # 🔥 Reduce tolerance
-            face_distances = face_recognition.face_distance(known_face_encodings, face_encoding)
-            best_match_index = np.argmin(face_distances) if face_distances.size > 0 else -1
+        good_locations, reasons = [], []
+        for face_location in face_locations:
+            reason = check_face_quality(
+                gray_image,
+                face_location,
+                lambda: face_recognition.face_landmarks(rgb_image, [face_location], model="small")[0],
+            )
+            if reason is None:
+                good_locations.append(face_location)
+            else:
+                reasons.append(reason)
+
+        if not good_locations:
+            if rejections is not None:
+                rejections.extend(reasons)
+            return image, "Unknown"
+
+        face_encodings = face_recognition.face_encodings(rgb_image, good_locations)
 
-            if best_match_index != -1 and matches[best_match_index]:
-                user_id = known_face_ids[best_match_index]
+        for face_encoding in face_encodings:
+            user_id = match_face(face_encoding, known_face_encodings, known_face_ids)
+            if user_id:
                 return image, user_id
 
         return image, "Unknown"
@@ -88,3 +118,89 @@ def recognize_face(image, known_face_encodings, known_face_ids):
     except Exception as e:
         print(f"🔥 ERROR in recognize_face(): {str(e)}")
         return image, "Unknown"
+
+def box_iou(a, b):
+    """Intersection over union of two (top, right, bottom, left) boxes."""
+    inter_h = max(0, min(a[2], b[2]) - max(a[0], b[0]))
+    inter_w = max(0, min(a[1], b[1]) - max(a[3], b[3]))
+    inter = inter_h * inter_w
+    union = (a[2] - a[0]) * (a[1] - a[3]) + (b[2] - b[0]) * (b[1] - b[3]) - inter
+    return inter / union if union else 0
+
+def refine_face_locations(rgb_frames, face_locations, max_frames=LIVENESS_REFINE_FRAMES):
+    """
+    Maps the camera's Haar boxes onto the boxes dlib's landmark model expects.
+    A HOG detection costs far more than the landmarks, so it only runs on
+    `max_frames` evenly spaced crops; their average box correction (relative to
+    the Haar box size) is applied to every frame, which keeps all boxes of the
+    track from the same source. Returns the camera's boxes unchanged when dlib
+    finds no matching face.
+    """
+    count = len(face_locations)
+    picks = sorted(set(np.linspace(0, count - 1, min(max_frames, count)).round().astype(int))) if count else []
+
+    corrections = []
+    for i in picks:
+        location = face_locations[i]
+        detected = face_recognition.face_locations(rgb_frames[i], number_of_times_to_upsample=0)  # Crops are already face-sized
+        best = max(detected, key=lambda box: box_iou(box, location), default=None)
+        if best is None or box_iou(best, location) < 0.3:
+            continue
+        height, width = location[2] - location[0], location[1] - location[3]
+        corrections.append([
+            (best[0] - location[0]) / height, (best[1] - location[1]) / width,
+            (best[2] - location[2]) / height, (best[3] - location[3]) / width,
+        ])
+
+    if not corrections:
+        return list(face_locations)
+
+    top, right, bottom, left = np.mean(corrections, axis=0)
+    refined = []
+    for location in face_locations:
+        height, width = location[2] - location[0], location[1] - location[3]
+        refined.append((
+            int(round(location[0] + top * height)), int(round(location[1] + right * width)),
+            int(round(location[2] + bottom * height)), int(round(location[3] + left * width)),
+        ))
+    return refined
+
+def track_landmarks(rgb_frames, face_locations):
+    """68-point landmarks of the tracked face in each crop."""
+    return [face_recognition.face_landmarks(rgb, [location])[0] for rgb, location in zip(rgb_frames, face_locations)]
+
+def recognize_track(frames, face_locations, known_face_encodings, known_face_ids):
+    """
+    Recognizes one tracked face from a short sequence of crops sent by the camera.
+    Landmarks are computed once per crop and shared by the quality gate and the
+    liveness check; only the sharpest crop is encoded, and only if the face is live.
+
+    :param frames: BGR crops of the same tracked face, in capture order.
+    :param face_locations: (top, right, bottom, left) face box in each crop, as found by the camera.
+    :param known_face_encodings: List of known face encodings.
+    :param known_face_ids: List of corresponding user IDs.
+    :return: Tuple (User ID or 'Unknown', liveness result or None, quality reason or None).
+    """
+    try:
+        rgb_frames = [cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) for frame in frames]
+        gray_frames = [cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) for frame in frames]
+        face_locations = refine_face_locations(rgb_frames, face_locations)
+        landmark_sequence = track_landmarks(rgb_frames, face_locations)
+
+        sharpness = [blur_score(crop_face(gray, location)) for gray, location in zip(gray_frames, face_locations)]
+        best = int(np.argmax(sharpness))
+
+        reason = check_face_quality(gray_frames[best], face_locations[best], lambda: landmark_sequence[best])
+        if reason:
+            return "Unknown", None, reason
+
+        liveness = check_liveness(gray_frames, face_locations, landmark_sequence, texture_index=best)
+        if not liveness["live"]:
+            return "Unknown", liveness, None
+
+        face_encoding = face_recognition.face_encodings(rgb_frames[best], [face_locations[best]])[0]
+        return match_face(face_encoding, known_face_encodings, known_face_ids) or "Unknown", liveness, None
+
+    except Exception as e:
+        print(f"🔥 ERROR in recognize_track(): {str(e)}")
+        return "Unknown", None, None
@@ -0,0 +1,174 @@
+import cv2
+import numpy as np
+from collections import Counter
+
+from core.config import (
+    LIVENESS_MIN_FRAMES,
+    LIVENESS_EAR_CLOSED,
+    LIVENESS_BLINK_RATIO,
+    LIVENESS_LANDMARK_JITTER_PX,
+    LIVENESS_BLINK_NOISE_MULTIPLE,
+    LIVENESS_MIN_EYE_WIDTH,
+    LIVENESS_LANDMARK_NOISE_PX,
+    LIVENESS_PARALLAX_NOISE_MULTIPLE,
+    LIVENESS_PARALLAX_MIN_FRAMES,
+    LIVENESS_MAX_MOIRE,
+)
+from facerecognition_module.quality import crop_face
+
+# ✅ Liveness failure reason codes
+TOO_FEW_FRAMES = "TOO_FEW_FRAMES"
+SPOOF_TEXTURE = "SPOOF_TEXTURE"  # Screen moire / print pattern in the skin texture
+NO_LIVE_MOTION = "NO_LIVE_MOTION"  # No blink and the face moved like a flat picture
+EYES_TOO_SMALL = "EYES_TOO_SMALL"  # No 3D motion and the eyes are too small to tell a blink from jitter
+
+liveness_stats = Counter()  # "checked", "live" and one counter per reason code
+
+
+def eye_aspect_ratio(eye):
+    """EAR of a 6-point eye: vertical openings over horizontal width, drops towards 0 when closed."""
+    eye = np.asarray(eye, dtype=np.float64)
+    vertical = np.linalg.norm(eye[1] - eye[5]) + np.linalg.norm(eye[2] - eye[4])
+    horizontal = np.linalg.norm(eye[0] - eye[3])
+    return float(vertical / (2 * horizontal)) if horizontal else 0.0
+
+
+def eye_width(landmarks):
+    """Mean corner-to-corner width of both eyes in pixels."""
+    return float(np.mean([
+        np.linalg.norm(np.asarray(landmarks[eye][0], dtype=np.float64) - np.asarray(landmarks[eye][3], dtype=np.float64))
+        for eye in ("left_eye", "right_eye")
+    ]))
+
+
+def blink_detected(landmark_sequence):
+    """
+    A blink is open eyes, then at least one closed frame, then open eyes again.
+    A photo keeps a constant EAR, but landmark jitter still moves it by about
+    jitter / eye width per frame, so on small faces the lowest of a few noisy
+    frames can look closed. The dip therefore has to be several times that
+    noise below the open frames on both sides of it, and eyes narrower than
+    LIVENESS_MIN_EYE_WIDTH never count.
+
+    :return: Tuple (blinked, list of per-frame EAR, median eye width in pixels).
+    """
+    ears = [
+        (eye_aspect_ratio(landmarks["left_eye"]) + eye_aspect_ratio(landmarks["right_eye"])) / 2
+        for landmarks in landmark_sequence
+    ]
+    width = float(np.median([eye_width(landmarks) for landmarks in landmark_sequence])) if landmark_sequence else 0.0
+    if not ears or width < LIVENESS_MIN_EYE_WIDTH:
+        return False, ears, width
+
+    closed = int(np.argmin(ears))
+    if closed == 0 or closed == len(ears) - 1:
+        return False, ears, width  # Needs open frames before and after the dip
+
+    open_ear = min(max(ears[:closed]), max(ears[closed + 1:]))
+    noise = LIVENESS_LANDMARK_JITTER_PX / width  # Per-frame EAR jitter of a still eye
+    blinked = (
+        ears[closed] < LIVENESS_EAR_CLOSED
+        and ears[closed] / open_ear < LIVENESS_BLINK_RATIO
+        and open_ear - ears[closed] > LIVENESS_BLINK_NOISE_MULTIPLE * noise
+    )
+    return blinked, ears, width
+
+
+def landmark_points(landmarks):
+    return np.concatenate([np.asarray(points, dtype=np.float64) for points in landmarks.values()])
+
+
+def parallax_residuals(landmark_sequence):
+    """
+    Motion that a flat picture can't produce. Any view of a flat photo or screen,
+    including tilting it, maps its landmarks onto the first frame's with a single
+    homography; a real 3D head turning (or a face changing expression) does not.
+    Every frame is compared with the first, so slow head motion accumulates
+    instead of drowning in the per-frame landmark jitter.
+
+    :return: RMS homography-fit residual in pixels of each later frame against the first.
+    """
+    residuals = []
+    reference = landmark_points(landmark_sequence[0]).astype(np.float32) if landmark_sequence else None
+    for landmarks in landmark_sequence[1:]:
+        points = landmark_points(landmarks).astype(np.float32)
+        if len(points) != len(reference) or len(points) < 5:
+            continue
+
+        homography, _ = cv2.findHomography(reference, points, 0)  # Least squares over all points, no outlier rejection
+        if homography is None:
+            continue
+        projected = cv2.perspectiveTransform(reference.reshape(-1, 1, 2), homography).reshape(-1, 2)
+        residuals.append(float(np.sqrt(np.mean(np.sum((projected - points) ** 2, axis=1)))))
+
+    return residuals
+
+
+def sustained_parallax(residuals):
+    """
+    Number of frames whose residual clears the landmark noise floor by a margin.
+    Jitter alone gives a flat picture a residual up to about the noise floor in
+    every frame, so a single frame above it is not enough; real head motion has
+    to hold over several frames.
+    """
+    threshold = LIVENESS_LANDMARK_NOISE_PX * LIVENESS_PARALLAX_NOISE_MULTIPLE
+    return sum(residual > threshold for residual in residuals)
+
+
+def moire_score(gray_crop):
+    """
+    Strongest isolated high-frequency peak of the face spectrum relative to the
+    mean. Screens and halftone prints add periodic patterns that show up as sharp
+    peaks; real skin gives a smooth spectrum.
+    """
+    face = cv2.resize(gray_crop, (128, 128)).astype(np.float64)
+    face -= face.mean()
+    face *= np.outer(np.hanning(128), np.hanning(128))  # Taper the borders, they would leak into axis peaks
+    spectrum = np.abs(np.fft.fftshift(np.fft.fft2(face)))
+
+    y, x = np.ogrid[-64:64, -64:64]
+    high_freq = spectrum[(x * x + y * y) > 16 * 16]  # Skip low frequencies (face shape, lighting)
+    mean = float(high_freq.mean())
+    return float(high_freq.max() / mean) if mean else 0.0
+
+
+def check_liveness(gray_frames, face_locations, landmark_sequence, texture_index=0):
+    """
+    Scores one tracked face from its short crop sequence. Everything works on
+    landmarks that are already computed plus one FFT, so it adds only a few ms.
+
+    :param gray_frames: Grayscale crops of the tracked face, in capture order.
+    :param face_locations: (top, right, bottom, left) box of the face in each crop.
+    :param landmark_sequence: 68-point face_recognition landmarks for each crop.
+    :param texture_index: Frame used for the texture check (the sharpest one).
+    :return: Dict with "live", "reason" (None if live) and the individual scores.
+    """
+    liveness_stats["checked"] += 1
+    result = {"live": False, "reason": None, "frames": len(landmark_sequence)}
+
+    if len(landmark_sequence) < LIVENESS_MIN_FRAMES:
+        result["reason"] = TOO_FEW_FRAMES
+    else:
+        blinked, ears, width = blink_detected(landmark_sequence)
+        result["blink"] = blinked
+        result["min_ear"] = round(min(ears), 3)
+        result["eye_px"] = round(width, 1)
+        residuals = parallax_residuals(landmark_sequence)
+        result["parallax_px"] = round(max(residuals), 2) if residuals else 0.0
+        result["parallax_frames"] = sustained_parallax(residuals)
+        result["moire"] = round(moire_score(crop_face(gray_frames[texture_index], face_locations[texture_index])), 2)
+
+        if result["moire"] > LIVENESS_MAX_MOIRE:
+            result["reason"] = SPOOF_TEXTURE
+        elif not blinked and result["parallax_frames"] < LIVENESS_PARALLAX_MIN_FRAMES:
+            result["reason"] = EYES_TOO_SMALL if width < LIVENESS_MIN_EYE_WIDTH else NO_LIVE_MOTION
+        else:
+            result["live"] = True
+
+    liveness_stats["live" if result["live"] else result["reason"]] += 1
+    return result
+
+
+def get_liveness_stats():
+    """Returns a snapshot of the liveness counters."""
+    return dict(liveness_stats)
@@ -0,0 +1,123 @@
+import cv2
+import numpy as np
+from collections import Counter
+
+from core.config import (
+    FACE_MIN_SIZE,
+    FACE_BLUR_THRESHOLD,
+    FACE_MAX_YAW,
+    FACE_MAX_ROLL,
+    FACE_MIN_BRIGHTNESS,
+    FACE_MAX_BRIGHTNESS,
+)
+
+# ✅ Rejection reason codes
+FACE_TOO_SMALL = "FACE_TOO_SMALL"
+FACE_BLURRY = "FACE_BLURRY"
+FACE_UNDEREXPOSED = "FACE_UNDEREXPOSED"
+FACE_OVEREXPOSED = "FACE_OVEREXPOSED"
+FACE_BAD_POSE = "FACE_BAD_POSE"
+
+# Reasons the camera can fix by simply trying again with the next frame
+RETRY_REASONS = {FACE_BLURRY, FACE_BAD_POSE}
+
+quality_stats = Counter()  # "checked", "passed" and one counter per reason code
+
+
+def face_size(face_location):
+    """Returns (width, height) of a face_recognition (top, right, bottom, left) box."""
+    top, right, bottom, left = face_location
+    return right - left, bottom - top
+
+
+def crop_face(image, face_location):
+    """Crops the face box out of the image, clamped to the image borders."""
+    top, right, bottom, left = face_location
+    height, width = image.shape[:2]
+    return image[max(top, 0):min(bottom, height), max(left, 0):min(right, width)]
+
+
+def blur_score(gray_crop):
+    """Variance of the Laplacian: low values mean a blurry crop."""
+    return float(cv2.Laplacian(gray_crop, cv2.CV_64F).var())
+
+
+def brightness_score(gray_crop):
+    """Mean gray level of the crop (0-255)."""
+    return float(np.mean(gray_crop))
+
+
+def pose_scores(landmarks):
+    """
+    Rough head pose from the 5-point (or 68-point) landmark set.
+
+    :param landmarks: One entry of face_recognition.face_landmarks().
+    :return: Tuple (yaw, roll). Yaw is the nose offset from the eye midpoint
+             relative to the eye distance, roll is the eye line tilt in degrees.
+    """
+    left_eye = np.mean(landmarks["left_eye"], axis=0)
+    right_eye = np.mean(landmarks["right_eye"], axis=0)
+    nose_tip = np.mean(landmarks["nose_tip"], axis=0)
+
+    eye_vector = right_eye - left_eye
+    eye_distance = float(np.linalg.norm(eye_vector))
+    if eye_distance == 0:
+        return float("inf"), float("inf")
+
+    eye_center = (left_eye + right_eye) / 2
+    yaw = abs(float(np.dot(nose_tip - eye_center, eye_vector))) / (eye_distance ** 2)
+    roll = abs(float(np.degrees(np.arctan2(eye_vector[1], eye_vector[0]))))
+    roll = min(roll, 180 - roll)
+    return yaw, roll
+
+
+def check_image_quality(gray_crop, width, height):
+    """
+    Cheap checks that need nothing but the grayscale crop (size, exposure, blur).
+    Also used by capture.py before a frame is uploaded.
+
+    :return: Reason code, or None if the crop looks usable.
+    """
+    if min(width, height) < FACE_MIN_SIZE:
+        return FACE_TOO_SMALL
+
+    brightness = brightness_score(gray_crop)
+    if brightness < FACE_MIN_BRIGHTNESS:
+        return FACE_UNDEREXPOSED
+    if brightness > FACE_MAX_BRIGHTNESS:
+        return FACE_OVEREXPOSED
+
+    if blur_score(gray_crop) < FACE_BLUR_THRESHOLD:
+        return FACE_BLURRY
+
+    return None
+
+
+def check_face_quality(gray_image, face_location, get_landmarks=None):
+    """
+    Runs the quality gate on one detected face, cheapest checks first.
+
+    :param gray_image: Full frame in grayscale.
+    :param face_location: (top, right, bottom, left) box from face_recognition.
+    :param get_landmarks: Optional callable returning the face landmarks. Only
+                          called once the cheap checks pass, enables the pose check.
+    :return: Reason code, or None if the face is good enough to encode.
+    """
+    quality_stats["checked"] += 1
+
+    width, height = face_size(face_location)
+    reason = check_image_quality(crop_face(gray_image, face_location), width, height)
+
+    landmarks = get_landmarks() if reason is None and get_landmarks is not None else None
+    if landmarks:
+        yaw, roll = pose_scores(landmarks)
+        if yaw > FACE_MAX_YAW or roll > FACE_MAX_ROLL:
+            reason = FACE_BAD_POSE
+
+    quality_stats[reason or "passed"] += 1
+    return reason
+
+
+def get_quality_stats():
+    """Returns a snapshot of the quality gate counters."""
+    return dict(quality_stats)
@@ -0,0 +1,76 @@
+import threading
+import time
+
+
+class RecognitionService:
+    """
+    Owns the face recognition stack (cv2, face_recognition, dlib models).
+    Nothing heavy is imported until the first call or warmup(), so workers that
+    never mark attendance never pay for loading the vision libraries.
+    """
+
+    def __init__(self):
+        self._detector = None
+        self._lock = threading.Lock()
+        self.load_seconds = None
+
+    @property
+    def loaded(self):
+        return self._detector is not None
+
+    def _load(self):
+        if self._detector is None:
+            with self._lock:
+                if self._detector is None:
+                    start = time.perf_counter()
+                    from facerecognition_module import detector
+
+                    self._detector = detector
+                    self.load_seconds = round(time.perf_counter() - start, 3)
+                    print(f"🧠 Face recognition stack loaded in {self.load_seconds}s")
+        return self._detector
+
+    def warmup(self):
+        """Import the vision libraries and run the dlib models once on a blank frame."""
+        detector = self._load()
+        blank = detector.np.zeros((160, 160, 3), dtype=detector.np.uint8)
+        rgb_blank = detector.cv2.cvtColor(blank, detector.cv2.COLOR_BGR2RGB)
+        detector.face_recognition.face_locations(rgb_blank)
+        detector.face_recognition.face_encodings(rgb_blank, [(20, 140, 140, 20)])
+        detector.face_recognition.face_landmarks(rgb_blank, [(20, 140, 140, 20)], model="small")
+        detector.face_recognition.face_landmarks(rgb_blank, [(20, 140, 140, 20)])  # 68-point model for liveness
+        print("✅ Face recognition warmup done")
+
+    def decode_image(self, image_bytes):
+        """Decodes uploaded bytes into a BGR image, None if the format is invalid."""
+        detector = self._load()
+        nparr = detector.np.frombuffer(image_bytes, detector.np.uint8)
+        return detector.cv2.imdecode(nparr, detector.cv2.IMREAD_COLOR)
+
+    async def load_known_faces(self):
+        return await self._load().load_known_faces()
+
+    def recognize_face(self, image, known_face_encodings, known_face_ids, rejections=None):
+        return self._load().recognize_face(image, known_face_encodings, known_face_ids, rejections)
+
+    def recognize_track(self, frames, face_locations, known_face_encodings, known_face_ids):
+        return self._load().recognize_track(frames, face_locations, known_face_encodings, known_face_ids)
+
+    def should_retry(self, reason):
+        """True if the camera can fix the rejection by sending another frame."""
+        from facerecognition_module.quality import RETRY_REASONS
+
+        return reason in RETRY_REASONS
+
+    def quality_stats(self):
+        from facerecognition_module.quality import get_quality_stats
+
+        return get_quality_stats()
+
+    def liveness_stats(self):
+        from facerecognition_module.liveness import get_liveness_stats
+
+        return get_liveness_stats()
+
+
+recognition_service = RecognitionService()
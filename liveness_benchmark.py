@@ -0,0 +1,147 @@
+"""
+Reports liveness latency and accuracy on a local test set.
+
+Expected layout (one folder per tracked face, frames sorted by name):
+    <root>/live/<sequence>/*.jpg
+    <root>/spoof/<sequence>/*.jpg      (printed photos, phone / monitor screens)
+A sequence folder may contain boxes.json ([[top, right, bottom, left], ...] per
+frame, as sent by capture.py); otherwise the face is detected in each frame.
+
+Usage:
+    python liveness_benchmark.py path/to/liveness_set
+    python liveness_benchmark.py path/to/liveness_set --calibrate
+
+--calibrate also prints the parallax residuals of live and spoof sequences and
+suggests LIVENESS_LANDMARK_NOISE_PX for these cameras.
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+import cv2
+import face_recognition
+import numpy as np
+
+from core.config import LIVENESS_PARALLAX_NOISE_MULTIPLE, LIVENESS_REFINE_FRAMES
+from facerecognition_module.detector import refine_face_locations, track_landmarks
+from facerecognition_module.liveness import check_liveness, parallax_residuals
+from facerecognition_module.quality import crop_face, blur_score
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+def load_sequence(folder):
+    names = sorted(name for name in os.listdir(folder) if name.lower().endswith(IMAGE_EXTENSIONS))
+    frames = [cv2.imread(os.path.join(folder, name)) for name in names]
+
+    boxes_path = os.path.join(folder, "boxes.json")
+    if os.path.exists(boxes_path):
+        with open(boxes_path) as f:
+            boxes = [tuple(box) for box in json.load(f)]
+    else:
+        boxes = []
+        for frame in frames:
+            locations = face_recognition.face_locations(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            boxes.append(locations[0] if locations else None)
+        frames = [frame for frame, box in zip(frames, boxes) if box]
+        boxes = [box for box in boxes if box]
+    return frames, boxes
+
+
+def run_sequence(frames, boxes):
+    """
+    Times the liveness work (box refinement, 68-point landmarks, scoring), the
+    box refinement on its own, and the single encoding it gates.
+    """
+    start = time.perf_counter()
+    rgb_frames = [cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) for frame in frames]
+    gray_frames = [cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) for frame in frames]
+    refine_start = time.perf_counter()
+    boxes = refine_face_locations(rgb_frames, boxes)
+    refine_ms = (time.perf_counter() - refine_start) * 1000
+    landmarks = track_landmarks(rgb_frames, boxes)
+    best = max(range(len(frames)), key=lambda i: blur_score(crop_face(gray_frames[i], boxes[i])))
+    result = check_liveness(gray_frames, boxes, landmarks, texture_index=best)
+    liveness_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    face_recognition.face_encodings(rgb_frames[best], [boxes[best]])
+    encoding_ms = (time.perf_counter() - start) * 1000
+
+    return result, liveness_ms, refine_ms, encoding_ms, parallax_residuals(landmarks)
+
+
+def print_calibration(residuals):
+    """Parallax residual percentiles per label and the noise floor they suggest."""
+    print("\n📐 Parallax residuals vs first frame (px)")
+    for label, values in residuals.items():
+        if values:
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            print(f"{label:<6} n={len(values):<5} p50 {p50:.2f}  p95 {p95:.2f}  p99 {p99:.2f}  max {max(values):.2f}")
+
+    if residuals["spoof"]:
+        # The floor must sit above what flat pictures reach, or they pass as 3D motion
+        floor = float(np.percentile(residuals["spoof"], 99))
+        print(f"Suggested LIVENESS_LANDMARK_NOISE_PX={floor:.2f} "
+              f"(motion threshold {floor * LIVENESS_PARALLAX_NOISE_MULTIPLE:.2f} px)")
+    else:
+        print("⚠️ No spoof sequences, can't suggest a noise floor")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Liveness latency and false accept / reject rates.")
+    parser.add_argument("root", help="Folder with live/ and spoof/ sequence folders")
+    parser.add_argument("--calibrate", action="store_true", help="Report parallax residuals and a suggested noise floor")
+    args = parser.parse_args()
+
+    liveness_times, refine_times, encoding_times = [], [], []
+    counts = {"live": [0, 0], "spoof": [0, 0]}  # label -> [accepted as live, total]
+    reasons = {}
+    residuals = {"live": [], "spoof": []}
+
+    for label in ("live", "spoof"):
+        label_dir = os.path.join(args.root, label)
+        if not os.path.isdir(label_dir):
+            continue
+        for sequence in sorted(os.listdir(label_dir)):
+            frames, boxes = load_sequence(os.path.join(label_dir, sequence))
+            if not frames:
+                print(f"⚠️ Skipping {label}/{sequence} (no face)")
+                continue
+
+            result, liveness_ms, refine_ms, encoding_ms, sequence_residuals = run_sequence(frames, boxes)
+            residuals[label] += sequence_residuals
+            liveness_times.append(liveness_ms)
+            refine_times.append(refine_ms)
+            encoding_times.append(encoding_ms)
+            counts[label][0] += result["live"]
+            counts[label][1] += 1
+            if result["reason"]:
+                reasons[result["reason"]] = reasons.get(result["reason"], 0) + 1
+            print(f"{label}/{sequence}: {result}")
+
+    if not liveness_times:
+        raise SystemExit("❌ No sequences found")
+
+    live_accepted, live_total = counts["live"]
+    spoof_accepted, spoof_total = counts["spoof"]
+    print("\n📊 Liveness benchmark")
+    print(f"Sequences: {live_total} live, {spoof_total} spoof")
+    if spoof_total:
+        print(f"False accept rate (spoof passed):  {spoof_accepted / spoof_total:.1%}")
+    if live_total:
+        print(f"False reject rate (live rejected): {(live_total - live_accepted) / live_total:.1%}")
+    print(f"Rejections by reason: {reasons}")
+    print(f"Liveness added latency: median {statistics.median(liveness_times):.1f} ms, max {max(liveness_times):.1f} ms")
+    print(f"  of which box refinement ({LIVENESS_REFINE_FRAMES} HOG detections): "
+          f"median {statistics.median(refine_times):.1f} ms, max {max(refine_times):.1f} ms")
+    print(f"Encoding (for comparison): median {statistics.median(encoding_times):.1f} ms")
+
+    if args.calibrate:
+        print_calibration(residuals)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+"""
+Load test for the attendance API.
+
+Simulates a fleet of kiosk cameras posting tracked faces to
+/api/mark-attendance-track, like capture.py, mixed with employee login / leave
+traffic and HR report polling, then prints p50/p95/p99 latency and error rates
+per endpoint and writes them to a JSON report.
+
+Usage:
+    python loadtest.py --serve --cameras 50 --duration 60
+    python loadtest.py --url http://127.0.0.1:8000 --compare old_report.json
+
+--serve starts the app in a separate process (loadtest_server.py) against an
+in-memory Mongo stand-in (mongomock-motor), so no real database is touched and
+the server's CPU work doesn't skew the generator's timers.
+
+Each camera request is one track: the crops and boxes.json of a sequence
+folder (same layout as a liveness_benchmark.py set, e.g. its live/ folder), or
+a loose image in --images repeated --track-frames times. A repeated still image
+fails the liveness check (403) before the encoder runs, so record real tracks
+to load the full pipeline.
+"""
+import argparse
+import asyncio
+import io
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+import httpx
+from PIL import Image
+
+from core.config import TRACK_FRAMES, TRACK_CROP_PADDING
+from loadtest_server import LOADTEST_USER
+
+DEFAULT_URL = "http://127.0.0.1:8000"
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+SERVER_START_TIMEOUT = 120  # Seconds, the recognition warmup loads the dlib models
+
+
+# ✅ Local server with an in-memory Mongo stand-in, in its own process
+def start_local_server(host, port):
+    """Runs loadtest_server.py in a subprocess and waits until it accepts requests."""
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "loadtest_server.py")
+    process = subprocess.Popen([sys.executable, script, "--host", host, "--port", str(port)])
+
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"❌ Local server exited with code {process.returncode}")
+        try:
+            httpx.get(f"http://{host}:{port}/", timeout=1)
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+
+    process.terminate()
+    raise SystemExit("❌ Local server did not start in time")
+
+
+def stop_local_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+# ✅ Stats collection
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.status_codes = defaultdict(lambda: defaultdict(int))
+        self.failures = defaultdict(int)  # 5xx responses and transport errors
+
+    def record(self, endpoint, latency, status_code):
+        self.latencies[endpoint].append(latency)
+        self.status_codes[endpoint][str(status_code)] += 1
+        if status_code == "error" or status_code >= 500:
+            self.failures[endpoint] += 1
+
+    def report(self, duration):
+        endpoints = {}
+        for endpoint, latencies in sorted(self.latencies.items()):
+            latencies = sorted(latencies)
+            count = len(latencies)
+            endpoints[endpoint] = {
+                "requests": count,
+                "throughput_rps": round(count / duration, 2),
+                "error_rate": round(self.failures[endpoint] / count, 4),
+                "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+                "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+                "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+                "max_ms": round(latencies[-1] * 1000, 1),
+                "status_codes": dict(self.status_codes[endpoint]),
+            }
+        return endpoints
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+async def timed_request(client, stats, endpoint, method, path, **kwargs):
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, path, **kwargs)
+        status_code = response.status_code
+    except httpx.HTTPError:
+        status_code = "error"
+    stats.record(endpoint, time.perf_counter() - start, status_code)
+
+
+# ✅ Simulated clients
+async def poisson_loop(rate, deadline, rng, action):
+    """Calls action() with exponentially distributed gaps (Poisson arrivals) until the deadline."""
+    if rate <= 0:
+        return
+    pending = set()
+    while True:
+        await asyncio.sleep(rng.expovariate(rate))
+        if time.monotonic() >= deadline:
+            break
+        # Fire and forget so a slow response doesn't throttle the arrival rate
+        task = asyncio.create_task(action())
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+    if pending:
+        await asyncio.gather(*pending)
+
+
+async def camera(client, stats, tracks, rate, deadline, rng, start_delay):
+    await asyncio.sleep(start_delay)
+
+    async def mark_attendance():
+        crops, boxes = rng.choice(tracks)
+        await timed_request(
+            client, stats, "POST /api/mark-attendance-track", "POST", "/api/mark-attendance-track",
+            files=[("files", (filename, image_bytes, "image/jpeg")) for filename, image_bytes in crops],
+            data={"boxes": json.dumps(boxes)},
+        )
+
+    await poisson_loop(rate, deadline, rng, mark_attendance)
+
+
+async def employee(client, stats, rate, deadline, rng):
+    user_id = LOADTEST_USER["employee_id"]
+
+    async def action():
+        choice = rng.random()
+        if choice < 0.4:
+            await timed_request(
+                client, stats, "POST /auth/login", "POST", "/auth/login",
+                json={"company_email": LOADTEST_USER["company_email"], "password": LOADTEST_USER["password"]},
+            )
+        elif choice < 0.6:
+            await timed_request(
+                client, stats, "POST /api/apply-leave", "POST", "/api/apply-leave",
+                json={
+                    "user_id": user_id,
+                    "employee_name": LOADTEST_USER["name"],
+                    "date": "2026-12-24T00:00:00",
+                    "leave_type": "Casual Leave",
+                    "reason": "Load test",
+                },
+            )
+        else:
+            await timed_request(client, stats, "GET /api/my-leaves", "GET", f"/api/my-leaves/{user_id}")
+
+    await poisson_loop(rate, deadline, rng, action)
+
+
+async def hr_dashboard(client, stats, rate, deadline, rng):
+    user_id = LOADTEST_USER["employee_id"]
+
+    async def action():
+        if rng.random() < 0.5:
+            await timed_request(client, stats, "GET /api/pending-leaves", "GET", "/api/pending-leaves")
+        else:
+            period = rng.choice(["daily", "weekly", "monthly"])
+            await timed_request(
+                client, stats, "GET /api/attendance-report", "GET", f"/api/attendance-report/{user_id}/{period}"
+            )
+
+    await poisson_loop(rate, deadline, rng, action)
+
+
+def read_image(path):
+    with open(path, "rb") as f:
+        return os.path.basename(path), f.read()
+
+
+def padded_face_box(image_bytes):
+    """Face box of a crop made like capture.py's: the face centered with TRACK_CROP_PADDING on each side."""
+    width, height = Image.open(io.BytesIO(image_bytes)).size
+    face_w, face_h = width / (1 + 2 * TRACK_CROP_PADDING), height / (1 + 2 * TRACK_CROP_PADDING)
+    left, top = (width - face_w) / 2, (height - face_h) / 2
+    return [int(top), int(left + face_w), int(top + face_h), int(left)]
+
+
+def load_tracks(folder, track_frames):
+    """Returns a list of (crops, boxes) tracks, one per sequence folder or loose image."""
+    tracks = []
+    for name in sorted(os.listdir(folder)):
+        path = os.path.join(folder, name)
+        boxes_path = os.path.join(path, "boxes.json")
+        if os.path.isfile(boxes_path):
+            crops = [read_image(os.path.join(path, frame)) for frame in sorted(os.listdir(path))
+                     if frame.lower().endswith(IMAGE_EXTENSIONS)]
+            with open(boxes_path) as f:
+                boxes = json.load(f)
+            tracks.append((crops, boxes))
+        elif name.lower().endswith(IMAGE_EXTENSIONS):
+            crop = read_image(path)
+            tracks.append(([crop] * track_frames, [padded_face_box(crop[1])] * track_frames))
+    if not tracks:
+        raise SystemExit(f"❌ No sequences or images found in {folder}")
+    return tracks
+
+
+async def run_load(args):
+    rng = random.Random(args.seed)
+    tracks = load_tracks(args.images, args.track_frames)
+    stats = Stats()
+
+    limits = httpx.Limits(max_connections=args.max_connections)
+    timeout = httpx.Timeout(args.timeout)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=timeout) as client:
+        start = time.monotonic()
+        deadline = start + args.duration
+        tasks = [
+            # Cameras start within the first `ramp` seconds, like kiosks at shift start
+            camera(client, stats, tracks, args.camera_rate, deadline, random.Random(rng.random()),
+                   rng.uniform(0, args.ramp))
+            for _ in range(args.cameras)
+        ]
+        tasks += [
+            employee(client, stats, args.employee_rate, deadline, random.Random(rng.random()))
+            for _ in range(args.employees)
+        ]
+        tasks += [
+            hr_dashboard(client, stats, args.hr_rate, deadline, random.Random(rng.random()))
+            for _ in range(args.hr_clients)
+        ]
+        await asyncio.gather(*tasks)
+        elapsed = time.monotonic() - start
+
+    return {
+        "config": {key: value for key, value in vars(args).items() if key not in ("compare", "output")},
+        "duration_s": round(elapsed, 2),
+        "endpoints": stats.report(elapsed),
+    }
+
+
+# ✅ Reporting
+def print_report(report, baseline=None):
+    header = f"{'endpoint':<30}{'reqs':>7}{'rps':>8}{'err%':>7}{'p50':>9}{'p95':>9}{'p99':>9}"
+    print(f"\n📊 Load test report ({report['duration_s']}s)")
+    print(header)
+    print("-" * len(header))
+    for endpoint, row in report["endpoints"].items():
+        print(
+            f"{endpoint:<30}{row['requests']:>7}{row['throughput_rps']:>8}{row['error_rate'] * 100:>6.1f}%"
+            f"{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}"
+        )
+        old = (baseline or {}).get("endpoints", {}).get(endpoint)
+        if old:
+            print(
+                f"{'  vs baseline':<30}{'':>7}{'':>8}{(row['error_rate'] - old['error_rate']) * 100:>+6.1f}%"
+                f"{row['p50_ms'] - old['p50_ms']:>+9.1f}{row['p95_ms'] - old['p95_ms']:>+9.1f}"
+                f"{row['p99_ms'] - old['p99_ms']:>+9.1f}"
+            )
+    print("(latencies in ms)")
+
+
+def broken_endpoints(report):
+    """Endpoints where every request failed, their latencies only measure the error path."""
+    return [endpoint for endpoint, row in report["endpoints"].items() if row["error_rate"] == 1]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load test the attendance API with simulated cameras.")
+    parser.add_argument("--url", default=DEFAULT_URL, help="Base URL of a running server")
+    parser.add_argument("--serve", action="store_true", help="Start the app locally with an in-memory Mongo")
+    parser.add_argument("--port", type=int, default=8765, help="Port used with --serve")
+    parser.add_argument("--images", default="uploads/attendance", help="Folder of track sequences or images to replay")
+    parser.add_argument("--track-frames", type=int, default=TRACK_FRAMES, help="Crops per track made from a loose image")
+    parser.add_argument("--cameras", type=int, default=50)
+    parser.add_argument("--camera-rate", type=float, default=0.5, help="Uploads per second per camera")
+    parser.add_argument("--ramp", type=float, default=5.0, help="Seconds over which cameras come online")
+    parser.add_argument("--employees", type=int, default=10)
+    parser.add_argument("--employee-rate", type=float, default=0.2, help="Requests per second per employee")
+    parser.add_argument("--hr-clients", type=int, default=3)
+    parser.add_argument("--hr-rate", type=float, default=1.0, help="Requests per second per HR dashboard")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to generate load")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--max-connections", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="loadtest_report.json", help="Where to write the JSON report")
+    parser.add_argument("--compare", help="Previous JSON report to diff against")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    server = None
+    if args.serve:
+        args.url = f"http://127.0.0.1:{args.port}"
+        server = start_local_server("127.0.0.1", args.port)
+        print(f"🚀 Local server with in-memory Mongo on {args.url}")
+
+    try:
+        report = asyncio.run(run_load(args))
+    finally:
+        if server:
+            stop_local_server(server)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    print_report(report, baseline)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Report saved to {args.output}")
+
+    broken = broken_endpoints(report)
+    if broken:
+        raise SystemExit(f"❌ Every request failed on: {', '.join(broken)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Runs the app against an in-memory Mongo stand-in (mongomock-motor), seeded with
+the load test user. Started as a separate process by `loadtest.py --serve`, so
+CPU-bound recognition in the server can't delay the load generator's timers.
+
+Usage:
+    python loadtest_server.py --port 8765
+"""
+import argparse
+import asyncio
+
+LOADTEST_USER = {
+    "name": "Load Test",
+    "company_email": "loadtest@company.com",
+    "password": "loadtest123",
+    "gender": "Other",
+    "role": "Employee",
+    "department": "QA",
+    "employee_id": "LT-001",
+    "dob": "1990-01-01",
+}
+
+
+def use_fake_database():
+    """Swaps the Motor client in database.connection for mongomock-motor. Must run before importing main."""
+    from mongomock_motor import AsyncMongoMockClient
+    import database.connection as connection
+
+    connection.client = AsyncMongoMockClient()
+    connection.db = connection.client["attendance_system"]
+    connection.users_collection = connection.db["users"]
+    connection.profiles_collection = connection.db["profiles"]
+    connection.attendance_collection = connection.db["attendance"]
+    return connection.db
+
+
+async def seed_fake_database(db):
+    from core.security import hash_password
+
+    user = {key: value for key, value in LOADTEST_USER.items() if key != "password"}
+    user["password"] = hash_password(LOADTEST_USER["password"])
+    await db["users"].insert_one(user)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the app with an in-memory Mongo for load tests.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    db = use_fake_database()
+    asyncio.run(seed_fake_database(db))
+
+    from main import app
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
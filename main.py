@@ -1,29 +1,67 @@
 from fastapi import FastAPI
 from routes.auth import auth_router
 from routes.profile import profile_router
-from routes.attendance import router as attendance_router
-from fastapi.staticfiles import StaticFiles
+from routes.attendance import router as attendance_router, recognition_router
 import os
 from routes.leave import router as leave_router
+from routes.images import images_router, CachedStaticFiles
+from database.connection import connect_to_mongo, close_mongo_connection, get_db_stats
+from facerecognition_module.service import recognition_service
+from core.config import APP_MODE, RECOGNITION_WARMUP
+from starlette.concurrency import run_in_threadpool
+
+if APP_MODE not in ("all", "api", "recognition"):
+    raise RuntimeError(f"Invalid APP_MODE '{APP_MODE}', use all, api or recognition")
+
+RECOGNITION_ENABLED = APP_MODE in ("all", "recognition")
 
 app = FastAPI()
 
-app.include_router(auth_router, prefix="/auth", tags=["Authentication"])
-app.include_router(profile_router, prefix="/api", tags=["Profile"])  # ✅ Prefix applied
-app.include_router(attendance_router, prefix="/api")
-app.include_router(leave_router, prefix="/api", tags=["Leave Management"])  # ✅ Added Leave API
+
+# ✅ Database lifecycle: warm the pool on startup, close it on shutdown
+@app.on_event("startup")
+async def startup_db():
+    await connect_to_mongo()
+
+
+# ✅ Load the face recognition stack up front, only on workers that serve it
+@app.on_event("startup")
+async def startup_recognition():
+    if RECOGNITION_ENABLED and RECOGNITION_WARMUP:
+        await run_in_threadpool(recognition_service.warmup)
+
+
+@app.on_event("shutdown")
+async def shutdown_db():
+    await close_mongo_connection()
+
+
+if APP_MODE != "recognition":
+    app.include_router(auth_router, prefix="/auth", tags=["Authentication"])
+    app.include_router(profile_router, prefix="/api", tags=["Profile"])  # ✅ Prefix applied
+    app.include_router(attendance_router, prefix="/api")
+    app.include_router(leave_router, prefix="/api", tags=["Leave Management"])  # ✅ Added Leave API
+    app.include_router(images_router, prefix="/api", tags=["Images"])
+
+if RECOGNITION_ENABLED:
+    app.include_router(recognition_router, prefix="/api")
 
 # ✅ Ensure `uploads/` directory exists
 os.makedirs("uploads/profile_pictures", exist_ok=True)
 os.makedirs("uploads/attendance", exist_ok=True)
 
 # ✅ Serve static files from "uploads"
-app.mount("/uploads", StaticFiles(directory="uploads", html=True), name="uploads")
+app.mount("/uploads", CachedStaticFiles(directory="uploads", html=True), name="uploads")
 
 
 @app.get("/")
 def home():
-    return {"message": "Welcome to AI Attendance System"}
+    return {"message": "Welcome to AI Attendance System", "mode": APP_MODE}
+
+
+@app.get("/health/db")
+async def db_health():
+    return await get_db_stats()
 
 
 if __name__ == "__main__":
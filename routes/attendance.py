@@ -1,15 +1,18 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-import cv2
-import numpy as np
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from starlette.concurrency import run_in_threadpool
 from datetime import datetime, timedelta
+from typing import List
+import json
 import os
 import traceback
 
 from database.connection import db
 from models.attendance import AttendanceBase
-from facerecognition_module.detector import recognize_face, load_known_faces
+from facerecognition_module.service import recognition_service  # ✅ Vision libs load lazily
+from core.config import LIVENESS_REQUIRED, LIVENESS_MAX_FRAMES
 
 router = APIRouter()
+recognition_router = APIRouter()  # Only mounted on workers with recognition enabled
 
 UPLOAD_DIR = "uploads/attendance/"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
@@ -18,21 +21,33 @@ CHECK_IN_START = 9
 CHECK_IN_END = 9.5  # 9:30 AM
 CHECK_OUT_START = 17  # 5:00 PM
 
-@router.post("/mark-attendance")
+@recognition_router.post("/mark-attendance")
 async def mark_attendance(file: UploadFile = File(...)):
     try:
         print("📸 Processing new attendance request...")
 
+        if LIVENESS_REQUIRED:
+            # A single frame can't prove liveness, cameras must use /mark-attendance-track
+            raise HTTPException(status_code=428, detail="Liveness check required, use /mark-attendance-track")
+
         image_bytes = await file.read()
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        img = recognition_service.decode_image(image_bytes)
 
         if img is None:
             raise HTTPException(status_code=400, detail="Invalid image format!")
 
-        known_face_encodings, known_face_ids = await load_known_faces()
+        known_face_encodings, known_face_ids = await recognition_service.load_known_faces()
+
+        rejections = []
+        frame, user_id = recognition_service.recognize_face(img, known_face_encodings, known_face_ids, rejections)
 
-        frame, user_id = recognize_face(img, known_face_encodings, known_face_ids)
+        if user_id == "Unknown" and rejections:
+            # ✅ Every detected face failed the quality gate, tell the camera why
+            reason = rejections[0]
+            raise HTTPException(
+                status_code=422,
+                detail={"message": "Face quality too low!", "reason": reason, "retry": recognition_service.should_retry(reason)},
+            )
 
         if user_id == "Unknown":
             raise HTTPException(status_code=400, detail="Face not recognized!")
@@ -41,10 +56,76 @@ async def mark_attendance(file: UploadFile = File(...)):
 
         return {"status": "success", "message": "Attendance Marked!", "user_id": user_id}
 
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+### ✅ MARK ATTENDANCE FROM A TRACKED FACE (LIVENESS CHECKED) ###
+@recognition_router.post("/mark-attendance-track")
+async def mark_attendance_track(files: List[UploadFile] = File(...), boxes: str = Form(...)):
+    """
+    Cameras send one request per tracked face: a few crops of the face over
+    ~1-2 seconds plus the face box in each crop as JSON [[top, right, bottom, left], ...].
+    """
+    try:
+        print(f"📸 Processing tracked face ({len(files)} frames)...")
+
+        try:
+            face_locations = [tuple(int(v) for v in box) for box in json.loads(boxes)]
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid boxes!")
+        if len(face_locations) != len(files) or any(len(box) != 4 for box in face_locations):
+            raise HTTPException(status_code=400, detail="Need exactly one box per frame!")
+        if len(files) > LIVENESS_MAX_FRAMES:
+            raise HTTPException(status_code=400, detail=f"Send at most {LIVENESS_MAX_FRAMES} frames!")
+
+        frames = [recognition_service.decode_image(await file.read()) for file in files]
+        if any(frame is None for frame in frames):
+            raise HTTPException(status_code=400, detail="Invalid image format!")
+
+        known_face_encodings, known_face_ids = await recognition_service.load_known_faces()
+
+        # ✅ Liveness and encoding run together, off the event loop
+        user_id, liveness, reason = await run_in_threadpool(
+            recognition_service.recognize_track, frames, face_locations, known_face_encodings, known_face_ids
+        )
+
+        if reason:
+            raise HTTPException(
+                status_code=422,
+                detail={"message": "Face quality too low!", "reason": reason, "retry": recognition_service.should_retry(reason)},
+            )
+
+        if liveness and not liveness["live"]:
+            print(f"🚫 Liveness check failed: {liveness}")
+            raise HTTPException(status_code=403, detail={"message": "Liveness check failed!", "liveness": liveness})
+
+        if user_id == "Unknown":
+            raise HTTPException(status_code=400, detail="Face not recognized!")
+
+        print(f"✅ Recognized live User ID: {user_id}")
+
+        return {"status": "success", "message": "Attendance Marked!", "user_id": user_id, "liveness": liveness}
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+### ✅ FACE QUALITY GATE STATS ###
+@recognition_router.get("/face-quality-stats")
+async def face_quality_stats():
+    return {"status": "success", "stats": recognition_service.quality_stats()}
+
+
+@recognition_router.get("/liveness-stats")
+async def liveness_stats():
+    return {"status": "success", "stats": recognition_service.liveness_stats()}
+
+
 
 
 
@@ -98,16 +179,18 @@ async def attendance_report(user_id: str, period: str):
         else:
             raise HTTPException(status_code=400, detail="Invalid report period! Use daily, weekly, monthly, or yearly.")
 
-        records = list(db.attendance.find({"user_id": user_id, "check_in": {"$gte": start_date}}))
+        records = await db.attendance.find({"user_id": user_id, "check_in": {"$gte": start_date}}).to_list(None)
         
         # Convert ObjectId & datetime to string for response
         for record in records:
             record["_id"] = str(record["_id"])
             record["check_in"] = record["check_in"].isoformat()
-            if record["check_out"]:
+            if record.get("check_out"):
                 record["check_out"] = record["check_out"].isoformat()
 
         return {"status": "success", "records": records}
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
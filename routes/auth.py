@@ -17,7 +17,7 @@ async def register(user: User):
     if user.password != user.confirm_password:
         raise HTTPException(status_code=400, detail="Passwords do not match")
 
-    existing_user = users_collection.find_one({"company_email": user.company_email})
+    existing_user = await users_collection.find_one({"company_email": user.company_email})
     if existing_user:
         raise HTTPException(status_code=400, detail="Company email already registered")
 
@@ -34,13 +34,13 @@ async def register(user: User):
         "dob": str(user.dob),  # Convert date to string for MongoDB
     }
 
-    users_collection.insert_one(new_user)
+    await users_collection.insert_one(new_user)
     return {"message": "User registered successfully"}
 
 # ✅ Login API (Saves Token in Cookies)
 @auth_router.post("/login")
 async def login(user: LoginRequest, response: Response):
-    user_data = users_collection.find_one({"company_email": user.company_email})
+    user_data = await users_collection.find_one({"company_email": user.company_email})
     if not user_data or not verify_password(user.password, user_data["password"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
@@ -0,0 +1,71 @@
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+from fastapi.staticfiles import StaticFiles
+import hashlib
+import os
+
+from core.config import IMAGE_CACHE_CONTROL, THUMBNAIL_SIZES
+from core.thumbnails import thumbnail_cache
+
+images_router = APIRouter()
+
+# ✅ Only images under these folders can be thumbnailed
+IMAGE_ROOTS = [os.path.abspath("dataset"), os.path.abspath("uploads")]
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles that also sends Cache-Control (ETag revalidation is built in)."""
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = IMAGE_CACHE_CONTROL
+        return response
+
+
+def resolve_image_path(file_path: str) -> str:
+    """Absolute path of an image inside IMAGE_ROOTS, 404 for anything else."""
+    full_path = os.path.abspath(file_path)
+    if not any(os.path.commonpath([root, full_path]) == root for root in IMAGE_ROOTS) or not os.path.isfile(full_path):
+        raise HTTPException(status_code=404, detail="Image not found")
+    return full_path
+
+
+async def thumbnail_response(request: Request, source_path: str, size: str):
+    """Serves a cached thumbnail of source_path with a strong ETag, 304 if the client has it."""
+    try:
+        path, etag = await thumbnail_cache.get(source_path, size)
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"Invalid size! Use {', '.join(THUMBNAIL_SIZES)}.")
+    except OSError:
+        raise HTTPException(status_code=415, detail="File is not a readable image")
+
+    return image_file_response(request, path, etag, media_type="image/jpeg")
+
+
+def image_file_response(request: Request, path: str, etag: str = None, media_type: str = None):
+    """
+    Serves an image with an ETag and Cache-Control, 304 if the client already has it.
+    Without an explicit etag one is derived from the file's mtime and size, so an
+    image overwritten in place gets a new ETag.
+    """
+    if etag is None:
+        stat = os.stat(path)
+        etag = '"' + hashlib.md5(f"{stat.st_mtime_ns}-{stat.st_size}".encode()).hexdigest() + '"'
+
+    headers = {"ETag": etag, "Cache-Control": IMAGE_CACHE_CONTROL}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+
+### ✅ Thumbnail of any profile picture / attendance snapshot
+@images_router.get("/thumbnails/{size}/{file_path:path}")
+async def get_thumbnail(size: str, file_path: str, request: Request):
+    """e.g. /api/thumbnails/small/uploads/attendance/image.jpg"""
+    return await thumbnail_response(request, resolve_image_path(file_path), size)
+
+
+@images_router.get("/thumbnail-cache-stats")
+async def thumbnail_cache_stats():
+    return {"status": "success", "stats": thumbnail_cache.stats()}
@@ -1,18 +1,129 @@
-from fastapi import APIRouter, HTTPException, Depends, Path, Body  # ✅ Added Body import
+from fastapi import APIRouter, HTTPException, Depends, Path, Body, Query, Request, Response  # ✅ Added Body import
 from datetime import datetime
 from database.connection import db
 from models.leave import LeaveBase, LeaveReview  # ✅ Import models correctly
 from models.user import User  # ✅ Assuming you have user roles stored
 from bson import ObjectId
-from typing import List
+from bson.errors import InvalidId
+from typing import List, Optional
+from core.cache import TTLCache, make_etag
+from core.config import LEAVE_PAGE_SIZE, LEAVE_MAX_PAGE_SIZE, PENDING_LEAVES_CACHE_TTL
 
 router = APIRouter()
 
+# Fields a client may ask for with ?fields=a,b,c (_id is always returned for paging)
+LEAVE_FIELDS = {
+    "user_id", "employee_name", "department", "date", "leave_type",
+    "reason", "status", "applied_at", "approved_by", "reviewed_at",
+}
+
+# ✅ Short-lived cache of pending-leave pages for HR dashboards that poll constantly
+pending_leaves_cache = TTLCache(ttl=PENDING_LEAVES_CACHE_TTL)
+
+
+def build_projection(fields: Optional[str]):
+    """Turns ?fields=a,b into a Mongo projection, defaulting to every leave field."""
+    if not fields:
+        return {field: 1 for field in LEAVE_FIELDS}
+
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - LEAVE_FIELDS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return {field: 1 for field in requested}
+
+
+def add_date_filter(query: dict, from_date: Optional[datetime], to_date: Optional[datetime]):
+    if from_date or to_date:
+        query["date"] = {}
+        if from_date:
+            query["date"]["$gte"] = from_date
+        if to_date:
+            query["date"]["$lte"] = to_date
+
+
+def encode_cursor(leave_id) -> str:
+    """Cursors keep the _id type, since Mongo range operators only match values of the same type."""
+    return f"o:{leave_id}" if isinstance(leave_id, ObjectId) else f"s:{leave_id}"
+
+
+def add_cursor_filter(query: dict, cursor: str, newest_first: bool):
+    """
+    Restricts the query to leaves after the cursor in _id order. Mongo sorts all
+    string _ids before all ObjectId _ids, so crossing from one type to the other
+    has to include every _id of the other type.
+    """
+    kind, _, value = cursor.partition(":")
+    try:
+        if kind == "o":
+            value = ObjectId(value)
+        elif kind != "s":
+            raise InvalidId(cursor)
+    except InvalidId:
+        raise HTTPException(status_code=400, detail="Invalid cursor!")
+
+    if newest_first:
+        if kind == "o":
+            query["$or"] = [{"_id": {"$lt": value}}, {"_id": {"$type": "string"}}]
+        else:
+            query["_id"] = {"$lt": value}
+    else:
+        if kind == "s":
+            query["$or"] = [{"_id": {"$gt": value}}, {"_id": {"$type": "objectId"}}]
+        else:
+            query["_id"] = {"$gt": value}
+
+
+async def fetch_leave_page(query: dict, projection: dict, cursor: Optional[str], limit: int, newest_first: bool):
+    """
+    Keyset pagination on _id: the cursor is the last _id of the previous page,
+    so every page is an index range scan instead of a growing skip().
+    """
+    if cursor:
+        add_cursor_filter(query, cursor, newest_first)
+
+    leaves = await (
+        db.leave.find(query, projection)
+        .sort("_id", -1 if newest_first else 1)
+        .limit(limit + 1)
+        .to_list(limit + 1)
+    )
+
+    next_cursor = None
+    if len(leaves) > limit:
+        leaves = leaves[:limit]
+        next_cursor = encode_cursor(leaves[-1]["_id"])
+
+    for leave in leaves:
+        leave["_id"] = str(leave["_id"])  # Convert ObjectId to string
+
+    return leaves, next_cursor
+
+
+def etag_response(request: Request, response: Response, payload: dict, etag: str):
+    """Returns 304 if the client already has this payload, otherwise the payload with its ETag."""
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return payload
+
+
+def leave_id_filter(leave_id: str):
+    """Leaves are stored with string _ids, older ones may still use ObjectId."""
+    try:
+        return {"_id": {"$in": [leave_id, ObjectId(leave_id)]}}
+    except InvalidId:
+        return {"_id": leave_id}
+
+
 ### **🔹 Employee Applies for Leave**
 @router.post("/apply-leave")
 async def apply_leave(leave_data: LeaveBase):
     """Employee applies for leave request"""
-    existing_user = db.users.find_one({"user_id": leave_data.user_id})
+    # Users are stored by /auth/register with their employee_id, which is the leave's user_id
+    existing_user = await db.users.find_one({"employee_id": leave_data.user_id}, {"department": 1})
 
     if not existing_user:
         raise HTTPException(status_code=400, detail="User not found!")
@@ -20,20 +131,42 @@ async def apply_leave(leave_data: LeaveBase):
     leave_entry = leave_data.dict()
     leave_entry["_id"] = str(ObjectId())  # Generate MongoDB Object ID
     leave_entry["status"] = "Pending"  # Default status
+    leave_entry["department"] = existing_user.get("department")  # ✅ Stored for HR department filters
 
-    db.leave.insert_one(leave_entry)
+    await db.leave.insert_one(leave_entry)
+    pending_leaves_cache.clear()
 
     return {"status": "success", "message": "Leave applied successfully!"}
 
 ### **🔹 HR Views All Pending Leaves**
 @router.get("/pending-leaves")
-async def get_pending_leaves():
-    """HR retrieves all pending leave requests"""
-    leaves = list(db.leave.find({"status": "Pending"}))  # ✅ Convert to list properly
-    for leave in leaves:
-        leave["_id"] = str(leave["_id"])  # Convert ObjectId to string
+async def get_pending_leaves(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(LEAVE_PAGE_SIZE, ge=1, le=LEAVE_MAX_PAGE_SIZE),
+    department: Optional[str] = None,
+    from_date: Optional[datetime] = None,
+    to_date: Optional[datetime] = None,
+    fields: Optional[str] = Query(None, description="Comma separated fields to return"),
+):
+    """HR retrieves pending leave requests, oldest first, one page at a time"""
+    cache_key = (cursor, limit, department, from_date, to_date, fields)
+    cached = pending_leaves_cache.get(cache_key)
+
+    if cached is None:
+        query = {"status": "Pending"}
+        if department:
+            query["department"] = department
+        add_date_filter(query, from_date, to_date)
 
-    return {"status": "success", "pending_leaves": leaves}
+        leaves, next_cursor = await fetch_leave_page(query, build_projection(fields), cursor, limit, newest_first=False)
+        payload = {"status": "success", "pending_leaves": leaves, "next_cursor": next_cursor}
+        cached = (payload, make_etag(payload))
+        pending_leaves_cache.set(cache_key, cached)
+
+    payload, etag = cached
+    return etag_response(request, response, payload, etag)
 
 ### **🔹 HR Approves or Rejects Leave (✅ FIXED)**
 @router.put("/review-leave/{leave_id}")
@@ -43,30 +176,44 @@ async def review_leave(
 ):
     try:
         # Check if leave exists
-        leave = db.leave.find_one({"_id": ObjectId(leave_id)})
+        leave = await db.leave.find_one(leave_id_filter(leave_id), {"_id": 1})
         if not leave:
             raise HTTPException(status_code=404, detail="Leave request not found.")
 
-        # ✅ FIX: Remove `await` from `update_one()`
-        result = db.leave.update_one(
-            {"_id": ObjectId(leave_id)},
+        result = await db.leave.update_one(
+            {"_id": leave["_id"]},
             {"$set": {"status": review.status, "approved_by": review.hr_id, "reviewed_at": datetime.utcnow()}}
         )
 
         if result.modified_count == 0:
             raise HTTPException(status_code=400, detail="Leave update failed.")
 
+        pending_leaves_cache.clear()
+
         return {"status": "success", "message": f"Leave {review.status} by HR {review.hr_id}"}
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 ### **🔹 Employee Views Their Leave Requests**
 @router.get("/my-leaves/{user_id}")
-async def get_my_leaves(user_id: str):
-    """Employee can check their own leave history"""
-    leaves = list(db.leave.find({"user_id": user_id}))  # ✅ Convert to list properly
-    for leave in leaves:
-        leave["_id"] = str(leave["_id"])  # Convert ObjectId to string
+async def get_my_leaves(
+    user_id: str,
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(LEAVE_PAGE_SIZE, ge=1, le=LEAVE_MAX_PAGE_SIZE),
+    from_date: Optional[datetime] = None,
+    to_date: Optional[datetime] = None,
+    fields: Optional[str] = Query(None, description="Comma separated fields to return"),
+):
+    """Employee can check their own leave history, newest first"""
+    query = {"user_id": user_id}
+    add_date_filter(query, from_date, to_date)
+
+    leaves, next_cursor = await fetch_leave_page(query, build_projection(fields), cursor, limit, newest_first=True)
+    payload = {"status": "success", "leaves": leaves, "next_cursor": next_cursor}
 
-    return {"status": "success", "leaves": leaves}
+    return etag_response(request, response, payload, make_etag(payload))
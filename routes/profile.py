@@ -184,15 +184,20 @@ async def get_profile(user_id: str):
     return profile
 
 # ✅ 🚀 Serve Profile Picture (GET)
-from fastapi.responses import FileResponse
+from fastapi import Request
+from routes.images import thumbnail_response, image_file_response
 
 @profile_router.get("/profile-picture/{filename}")
-async def get_profile_picture(filename: str):
-    file_path = os.path.join(DATASET_DIR, filename)
+async def get_profile_picture(filename: str, request: Request, size: Optional[str] = None):
+    """Full picture by default, ?size=small|medium|large for a cached thumbnail"""
+    file_path = os.path.join(DATASET_DIR, os.path.basename(filename))
     if not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="Image not found")
-    
-    return FileResponse(file_path)
+
+    if size:
+        return await thumbnail_response(request, file_path, size)
+
+    return image_file_response(request, file_path)
 
 # ✅ 🚀 Update Profile Picture (PUT)
 @profile_router.put("/profile/{user_id}")
@@ -0,0 +1,62 @@
+"""
+Measures import time and memory of main.py for each APP_MODE.
+
+Every mode runs in a fresh interpreter so nothing is already imported.
+Usage:
+    python startup_benchmark.py [--runs 3]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Runs inside the child interpreter
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import main
+import_s = time.perf_counter() - start
+import_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+warmup_s = None
+if main.RECOGNITION_ENABLED:
+    start = time.perf_counter()
+    main.recognition_service.warmup()
+    warmup_s = time.perf_counter() - start
+print(json.dumps({
+    "import_s": import_s,
+    "warmup_s": warmup_s,
+    "import_rss_mb": import_rss / 1024,
+    "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "vision_imported": any(name in sys.modules for name in ("cv2", "face_recognition", "dlib")),
+}))
+"""
+
+MODES = ["api", "recognition", "all"]
+
+
+def measure(mode):
+    env = dict(os.environ, APP_MODE=mode)
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure startup cost per APP_MODE.")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per mode (the fastest import is kept)")
+    args = parser.parse_args()
+
+    print(f"{'mode':<13}{'import s':>10}{'warmup s':>10}{'import RSS MB':>15}{'peak RSS MB':>13}  vision libs")
+    for mode in MODES:
+        result = min((measure(mode) for _ in range(args.runs)), key=lambda r: r["import_s"])
+        warmup = f"{result['warmup_s']:.2f}" if result["warmup_s"] is not None else "-"
+        print(
+            f"{mode:<13}{result['import_s']:>10.2f}{warmup:>10}{result['import_rss_mb']:>15.1f}"
+            f"{result['peak_rss_mb']:>13.1f}  {'yes' if result['vision_imported'] else 'no'}"
+        )
+
+
+if __name__ == "__main__":
+    main()